@@ -10,6 +10,22 @@ from xarray.backends import BackendEntrypoint
 
 from cog3pio import CogReader
 
+# File extensions that the 'cog3pio' engine will try to open
+_TIFF_EXTS = frozenset({".tif", ".tiff"})
+
+
+def _readonly_band_index(channels: int) -> np.ndarray:
+    """
+    Read-only array of band numbers, i.e. 0, 1, ..., channels - 1.
+    """
+    band_index = np.arange(stop=channels, dtype=np.uint8)
+    band_index.setflags(write=False)
+    return band_index
+
+
+# Band coordinates for up to 32 bands, shared between opened datasets
+_BAND_INDEX = tuple(_readonly_band_index(channels=n) for n in range(33))
+
 
 # %%
 class Cog3pioBackendEntrypoint(BackendEntrypoint):
@@ -18,7 +34,7 @@ class Cog3pioBackendEntrypoint(BackendEntrypoint):
     """
 
     description = "Use .tif files in Xarray"
-    open_dataset_parameters = ["filename_or_obj"]
+    open_dataset_parameters = ["filename_or_obj", "overview_level"]
     url = "https://github.com/weiji14/cog3pio"
 
     def open_dataset(
@@ -28,29 +44,34 @@ class Cog3pioBackendEntrypoint(BackendEntrypoint):
         drop_variables=None,
         # other backend specific keyword arguments
         # `chunks` and `cache` DO NOT go here, they are handled by xarray
+        overview_level: int | None = None,
     ) -> xr.Dataset:
-        reader = CogReader(path=filename_or_obj)
+        reader = CogReader(path=filename_or_obj, overview_level=overview_level)
 
-        array: np.ndarray = reader.to_numpy()
-        x_coords, y_coords = reader.xy_coords()
+        array, x_coords, y_coords = reader.read_all()
 
         channels, height, width = array.shape
-        dataarray: xr.DataArray = xr.DataArray(
-            data=array,
+        band_index: np.ndarray = (
+            _BAND_INDEX[channels]
+            if channels < len(_BAND_INDEX)
+            else _readonly_band_index(channels=channels)
+        )
+        dataset: xr.Dataset = xr.Dataset(
+            data_vars={"raster": (("band", "y", "x"), array)},
             coords={
-                "band": np.arange(stop=channels, dtype=np.uint8),
+                "band": band_index,
                 "y": y_coords,
                 "x": x_coords,
             },
-            name=None,
-            attrs=None,
         )
 
-        return dataarray.to_dataset(name="raster")
+        return dataset
 
-    def guess_can_open(self, filename_or_obj):
-        try:
-            _, ext = os.path.splitext(filename_or_obj)
-        except TypeError:
+    def guess_can_open(self, filename_or_obj) -> bool:
+        if not isinstance(filename_or_obj, (str, os.PathLike)):
+            return False
+        path = os.fspath(filename_or_obj)
+        if not isinstance(path, str):
             return False
-        return ext in {".tif", ".tiff"}
+        i: int = path.rfind(".")
+        return i >= 0 and path[i:].lower() in _TIFF_EXTS
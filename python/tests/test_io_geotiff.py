@@ -1,7 +1,9 @@
 """
 Test I/O on GeoTIFF files.
 """
+import multiprocessing
 import os
+import sys
 import tempfile
 import urllib.request
 
@@ -36,6 +38,19 @@ def test_read_geotiff_local(geotiff_path):
     assert array.dtype == "float32"
 
 
+def test_read_geotiff_local_matches_remote(geotiff_path):
+    """
+    Ensure that reading a GeoTIFF file from a local file path gives the same pixel
+    data as reading it from a remote URL.
+    """
+    np.testing.assert_equal(
+        actual=read_geotiff(path=geotiff_path),
+        desired=read_geotiff(
+            path="https://github.com/pka/georaster/raw/v0.1.0/data/tiff/float32.tif"
+        ),
+    )
+
+
 @pytest.mark.benchmark
 def test_read_geotiff_remote():
     """
@@ -60,6 +75,39 @@ def test_read_geotiff_multi_band():
     assert array.dtype == "float32"
 
 
+def _read_geotiff_shape(path, queue):
+    """
+    Read a GeoTIFF file and put the shape of its array into a multiprocessing queue.
+    """
+    queue.put(read_geotiff(path=path).shape)
+
+
+@pytest.mark.skipif(
+    condition="fork" not in multiprocessing.get_all_start_methods()
+    or sys.platform == "darwin",
+    reason="Requires the 'fork' multiprocessing start method (unsafe on macOS)",
+)
+def test_read_geotiff_remote_after_fork():
+    """
+    Ensure that a remote GeoTIFF file can be read from a forked child process, after
+    the parent process has already done a remote read.
+    """
+    path = "https://github.com/pka/georaster/raw/v0.1.0/data/tiff/float32.tif"
+    assert read_geotiff(path=path).shape == (1, 20, 20)
+
+    context = multiprocessing.get_context(method="fork")
+    queue = context.Queue()
+    process = context.Process(target=_read_geotiff_shape, args=(path, queue))
+    process.start()
+    process.join(timeout=60)
+    if process.is_alive():
+        process.terminate()
+        pytest.fail(reason="Remote read in forked child process did not finish")
+
+    assert process.exitcode == 0
+    assert queue.get(timeout=5) == (1, 20, 20)
+
+
 def test_read_geotiff_invalid_filepath():
     """
     Check that a ValueError is raised when an invalid filepath is passed to read_geotiff.
@@ -76,6 +124,16 @@ def test_read_geotiff_invalid_remote_url():
         read_geotiff(path="protocol://file.ext")
 
 
+def test_read_geotiff_missing_filepath(tmp_path):
+    """
+    Check that a FileNotFoundError is raised when a local filepath pointing to a
+    non-existent file is passed to read_geotiff.
+    """
+    missing_path = os.path.join(tmp_path, "missing.tif")
+    with pytest.raises(FileNotFoundError, match="Cannot find file: .*missing.tif"):
+        read_geotiff(path=missing_path)
+
+
 def test_read_geotiff_missing_url():
     """
     Check that a FileNotFoundError is raised when a url pointing to a non-existent file
@@ -132,3 +190,72 @@ def test_CogReader_to_numpy():
             [[[1.41, 1.23, 0.78], [0.32, -0.23, -1.88]]], dtype=np.float32
         ),
     )
+
+
+def test_CogReader_read_all():
+    """
+    Ensure that the CogReader class's `read_all` method produces the pixel data and
+    x/y coordinates as numpy.ndarray outputs.
+    """
+    reader = CogReader(
+        path="https://github.com/rasterio/rasterio/raw/1.3.9/tests/data/float32.tif"
+    )
+    array, x_coords, y_coords = reader.read_all()
+    assert array.shape == (1, 2, 3)  # band, height, width
+    np.testing.assert_equal(
+        actual=array,
+        desired=np.array(
+            [[[1.41, 1.23, 0.78], [0.32, -0.23, -1.88]]], dtype=np.float32
+        ),
+    )
+    assert x_coords.shape == (3,)
+    assert y_coords.shape == (2,)
+
+    reader = CogReader(
+        path="https://github.com/cogeotiff/rio-tiler/raw/6.4.0/tests/fixtures/cog_nodata_nan.tif"
+    )
+    array, x_coords, y_coords = reader.read_all()
+    assert array.shape == (1, 549, 549)  # band, height, width
+    assert array[0, 500, 500] == np.float32(0.13482364)
+    np.testing.assert_equal(
+        actual=x_coords[[0, -1]], desired=np.array([500080.0, 609680.0])
+    )
+    np.testing.assert_equal(
+        actual=y_coords[[0, -1]], desired=np.array([5299940.0, 5190340.0])
+    )
+
+
+def test_CogReader_overview_level():
+    """
+    Ensure that passing overview_level to the CogReader class reads the reduced
+    resolution image, with x/y coordinates covering the full resolution image's extent.
+    """
+    reader = CogReader(
+        path="https://github.com/cogeotiff/rio-tiler/raw/6.4.0/tests/fixtures/cog_nodata_nan.tif",
+        overview_level=1,
+    )
+    array, x_coords, y_coords = reader.read_all()
+    assert array.shape == (1, 275, 275)  # band, height, width
+    assert array.dtype == "float32"
+
+    res = 200.0 * 549 / 275  # pixel size of overview, in metres
+    np.testing.assert_allclose(
+        actual=x_coords[[0, -1]],
+        desired=[499980.0 + res / 2, 499980.0 + 549 * 200.0 - res / 2],
+    )
+    np.testing.assert_allclose(
+        actual=y_coords[[0, -1]],
+        desired=[5300040.0 - res / 2, 5300040.0 - 549 * 200.0 + res / 2],
+    )
+
+
+def test_CogReader_overview_level_missing():
+    """
+    Check that a ValueError is raised when the CogReader class is asked for an overview
+    level that does not exist in the GeoTIFF file.
+    """
+    with pytest.raises(ValueError, match="Overview level 1 not found in .*float32.tif"):
+        CogReader(
+            path="https://github.com/rasterio/rasterio/raw/1.3.9/tests/data/float32.tif",
+            overview_level=1,
+        )
@@ -2,10 +2,14 @@
 Tests for xarray 'cog3pio' backend engine.
 """
 
+import pathlib
+
 import numpy as np
 import pytest
 import xarray as xr
 
+from cog3pio.xarray_backend import Cog3pioBackendEntrypoint
+
 try:
     import rioxarray
 
@@ -44,3 +48,43 @@ def test_xarray_backend_open_dataarray(engine):
         assert da.y.max() == 5299940.0
         assert da.dtype == "float32"
         # np.testing.assert_allclose(actual=da.mean(), desired=0.181176)
+
+
+def test_xarray_backend_open_dataarray_overview_level():
+    """
+    Ensure that passing overview_level to xarray.open_dataarray with engine='cog3pio'
+    reads the reduced resolution overview image.
+    """
+    with xr.open_dataarray(
+        filename_or_obj="https://github.com/cogeotiff/rio-tiler/raw/6.4.1/tests/fixtures/cog_nodata_nan.tif",
+        engine="cog3pio",
+        overview_level=1,
+    ) as da:
+        res = 200.0 * 549 / 275  # pixel size of overview, in metres
+        assert da.sizes == {"band": 1, "y": 275, "x": 275}
+        np.testing.assert_allclose(actual=da.x.min(), desired=499980.0 + res / 2)
+        np.testing.assert_allclose(actual=da.x.max(), desired=609780.0 - res / 2)
+        np.testing.assert_allclose(actual=da.y.min(), desired=5190240.0 + res / 2)
+        np.testing.assert_allclose(actual=da.y.max(), desired=5300040.0 - res / 2)
+        assert da.dtype == "float32"
+
+
+@pytest.mark.parametrize(
+    ("filename_or_obj", "expected"),
+    [
+        ("https://example.com/geo.tif", True),
+        ("/path/to/geo.TIFF", True),
+        (pathlib.Path("geo.tif"), True),
+        ("https://example.com/geo.nc", False),
+        ("https://example.com/geo", False),
+        (b"geo.tif", False),
+        (None, False),
+    ],
+)
+def test_xarray_backend_guess_can_open(filename_or_obj, expected):
+    """
+    Ensure that the 'cog3pio' backend engine only claims paths with a .tif or .tiff
+    file extension.
+    """
+    backend = Cog3pioBackendEntrypoint()
+    assert backend.guess_can_open(filename_or_obj=filename_or_obj) is expected
@@ -1,15 +1,46 @@
 use std::io::{Read, Seek};
 
 use geo::AffineTransform;
-use ndarray::{Array, Array1, Array3};
+use ndarray::{Array1, Array3};
+use tiff::decoder::ifd::Value;
 use tiff::decoder::{Decoder, DecodingResult, Limits};
 use tiff::tags::Tag;
 use tiff::{ColorType, TiffError, TiffFormatError, TiffResult, TiffUnsupportedError};
 
+/// GeoTIFF tags used to georeference an image, as raw values
+struct GeoTags {
+    /// ModelTransformationTag (4x4 affine matrix), if present
+    model_transformation: Option<Vec<f64>>,
+    /// ModelPixelScaleTag (pixel size in x, y and z direction), if present
+    pixel_scale: Option<Vec<f64>>,
+    /// ModelTiepointTag (raster to model coordinate tie points), if present
+    tie_points: Option<Vec<f64>>,
+}
+
+impl GeoTags {
+    /// Read the GeoTIFF tags of the decoder's current image
+    fn read<R: Read + Seek>(decoder: &mut Decoder<R>) -> TiffResult<Self> {
+        let mut find_f64_vec = |tag: Tag| -> TiffResult<Option<Vec<f64>>> {
+            decoder.find_tag(tag)?.map(Value::into_f64_vec).transpose()
+        };
+
+        Ok(Self {
+            model_transformation: find_f64_vec(Tag::ModelTransformationTag)?,
+            pixel_scale: find_f64_vec(Tag::ModelPixelScaleTag)?,
+            tie_points: find_f64_vec(Tag::ModelTiepointTag)?,
+        })
+    }
+}
+
 /// Cloud-optimized GeoTIFF reader
 pub(crate) struct CogReader<R: Read + Seek> {
     /// TIFF decoder
     pub decoder: Decoder<R>,
+    /// Affine transformation matrix, cached once read from the GeoTIFF tags
+    transform: Option<AffineTransform<f64>>,
+    /// GeoTIFF tags and (width, height) of the full resolution image, kept when the
+    /// decoder is switched to an overview image
+    full_resolution: Option<(GeoTags, (u32, u32))>,
 }
 
 impl<R: Read + Seek> CogReader<R> {
@@ -19,7 +50,54 @@ impl<R: Read + Seek> CogReader<R> {
         let mut decoder = Decoder::new(stream)?;
         decoder = decoder.with_limits(Limits::unlimited());
 
-        Ok(Self { decoder })
+        Ok(Self {
+            decoder,
+            transform: None,
+            full_resolution: None,
+        })
+    }
+
+    /// Switch the decoder to an overview (reduced resolution) image of the GeoTIFF
+    ///
+    /// Level 0 is the full resolution image, level 1 is the first overview image after it,
+    /// and so on. Only images marked as reduced resolution (and not as a transparency
+    /// mask) by their NewSubfileType tag are counted as overviews. Expects the decoder to
+    /// still be at the full resolution image.
+    ///
+    /// The affine transformation is later derived from the full resolution image's
+    /// GeoTIFF tags (since overviews typically have none), with the pixel size scaled to
+    /// match the overview's dimensions.
+    pub fn seek_to_overview(&mut self, level: usize) -> TiffResult<()> {
+        if level == 0 {
+            return Ok(());
+        }
+        let geo_tags = GeoTags::read(&mut self.decoder)?;
+        let full_dimensions: (u32, u32) = self.decoder.dimensions()?;
+
+        // Walk the image file directories to the requested overview, skipping masks
+        let mut overviews_found: usize = 0;
+        while overviews_found < level {
+            if !self.decoder.more_images() {
+                return Err(TiffError::FormatError(
+                    TiffFormatError::ImageFileDirectoryNotFound,
+                ));
+            }
+            self.decoder.next_image()?;
+
+            let subfile_type: u32 = match self.decoder.find_tag(Tag::NewSubfileType)? {
+                Some(value) => value.into_u32()?,
+                None => 0,
+            };
+            // Bit 1 is set for reduced resolution images, bit 4 for transparency masks
+            if subfile_type & 1 != 0 && subfile_type & 4 == 0 {
+                overviews_found += 1;
+            }
+        }
+
+        self.full_resolution = Some((geo_tags, full_dimensions));
+        self.transform = None;
+
+        Ok(())
     }
 
     /// Decode GeoTIFF image to an [`ndarray::Array`]
@@ -53,10 +131,21 @@ impl<R: Read + Seek> CogReader<R> {
             }
         };
 
-        // Put image pixel data into an ndarray
-        let array_data =
-            Array3::from_shape_vec((num_bands, height as usize, width as usize), image_data)
-                .map_err(|_| TiffFormatError::InconsistentSizesEncountered)?;
+        // Put image pixel data into a C-contiguous ndarray of shape (band, height, width)
+        let (height, width): (usize, usize) = (height as usize, width as usize);
+        let array_data = match self.decoder.get_tag_u32(Tag::PlanarConfiguration) {
+            // Chunky (default), bands are interleaved per pixel, i.e. (height, width, band)
+            Err(_) | Ok(1) if num_bands > 1 => {
+                Array3::from_shape_vec((height, width, num_bands), image_data)
+                    .map_err(|_| TiffFormatError::InconsistentSizesEncountered)?
+                    .permuted_axes([2, 0, 1])
+                    .as_standard_layout()
+                    .into_owned()
+            }
+            // Planar or single band, pixels are already ordered as (band, height, width)
+            _ => Array3::from_shape_vec((num_bands, height, width), image_data)
+                .map_err(|_| TiffFormatError::InconsistentSizesEncountered)?,
+        };
 
         Ok(array_data)
     }
@@ -83,21 +172,46 @@ impl<R: Read + Seek> CogReader<R> {
     /// References:
     /// - <https://docs.ogc.org/is/19-008r4/19-008r4.html#_coordinate_transformations>
     fn transform(&mut self) -> TiffResult<AffineTransform<f64>> {
-        // Get x and y axis rotation (not yet implemented)
-        let (x_rotation, y_rotation): (f64, f64) =
-            match self.decoder.get_tag_f64_vec(Tag::ModelTransformationTag) {
-                Ok(_model_transformation) => unimplemented!("Non-zero rotation is not handled yet"),
-                Err(_) => (0.0, 0.0),
+        // Reuse the transform if the GeoTIFF tags have already been parsed
+        if let Some(transform) = self.transform {
+            return Ok(transform);
+        }
+
+        // Use the full resolution image's GeoTIFF tags when reading an overview
+        let current_geo_tags: GeoTags;
+        let (geo_tags, (full_width, full_height)): (&GeoTags, (u32, u32)) =
+            match &self.full_resolution {
+                Some((geo_tags, full_dimensions)) => (geo_tags, *full_dimensions),
+                None => {
+                    current_geo_tags = GeoTags::read(&mut self.decoder)?;
+                    (&current_geo_tags, self.decoder.dimensions()?)
+                }
             };
 
+        // Get x and y axis rotation (not yet implemented)
+        let (x_rotation, y_rotation): (f64, f64) = match geo_tags.model_transformation {
+            Some(_) => unimplemented!("Non-zero rotation is not handled yet"),
+            None => (0.0, 0.0),
+        };
+
         // Get pixel size in x and y direction
-        let pixel_scale: Vec<f64> = self.decoder.get_tag_f64_vec(Tag::ModelPixelScaleTag)?;
+        let pixel_scale: &Vec<f64> =
+            geo_tags.pixel_scale.as_ref().ok_or(TiffError::FormatError(
+                TiffFormatError::RequiredTagNotFound(Tag::ModelPixelScaleTag),
+            ))?;
         let [x_scale, y_scale, _z_scale] = pixel_scale[0..3] else {
             return Err(TiffError::FormatError(TiffFormatError::InvalidTag));
         };
 
+        // Scale pixel size by ratio of full resolution to current image dimensions
+        let (width, height): (u32, u32) = self.decoder.dimensions()?;
+        let x_scale: f64 = x_scale * full_width as f64 / width as f64;
+        let y_scale: f64 = y_scale * full_height as f64 / height as f64;
+
         // Get x and y coordinates of upper left pixel
-        let tie_points: Vec<f64> = self.decoder.get_tag_f64_vec(Tag::ModelTiepointTag)?;
+        let tie_points: &Vec<f64> = geo_tags.tie_points.as_ref().ok_or(TiffError::FormatError(
+            TiffFormatError::RequiredTagNotFound(Tag::ModelTiepointTag),
+        ))?;
         let [_i, _j, _k, x_origin, y_origin, _z_origin] = tie_points[0..6] else {
             return Err(TiffError::FormatError(TiffFormatError::InvalidTag));
         };
@@ -106,6 +220,7 @@ impl<R: Read + Seek> CogReader<R> {
         let transform = AffineTransform::new(
             x_scale, x_rotation, x_origin, y_rotation, -y_scale, y_origin,
         );
+        self.transform = Some(transform);
 
         Ok(transform)
     }
@@ -125,13 +240,9 @@ impl<R: Read + Seek> CogReader<R> {
         // Get number of pixels along the x and y dimensions
         let (x_pixels, y_pixels): (u32, u32) = self.decoder.dimensions()?;
 
-        // Get xy coordinate of the center of the bottom right pixel
-        let x_end: f64 = x_origin + x_res * x_pixels as f64;
-        let y_end: f64 = y_origin + y_res * y_pixels as f64;
-
-        // Get array of x-coordinates and y-coordinates
-        let x_coords = Array::range(x_origin.to_owned(), x_end, x_res.to_owned());
-        let y_coords = Array::range(y_origin.to_owned(), y_end, y_res.to_owned());
+        // Get array of x-coordinates and y-coordinates, one per pixel column and row
+        let x_coords = Array1::from_shape_fn(x_pixels as usize, |i| x_origin + x_res * i as f64);
+        let y_coords = Array1::from_shape_fn(y_pixels as usize, |j| y_origin + y_res * j as f64);
 
         Ok((x_coords, y_coords))
     }
@@ -157,6 +268,7 @@ mod tests {
     use object_store::parse_url;
     use tempfile::tempfile;
     use tiff::encoder::{colortype, TiffEncoder};
+    use tiff::tags::Tag;
     use url::Url;
 
     use crate::io::geotiff::{read_geotiff, CogReader};
@@ -190,6 +302,105 @@ mod tests {
         assert_eq!(arr.mean(), Some(14.0));
     }
 
+    #[test]
+    fn test_read_geotiff_multi_band_chunky() {
+        // Pixel data for a 3x2 image with 2 bands, interleaved per pixel (chunky), where
+        // each value is band * 100 + y * 10 + x
+        let (width, height, bands): (u32, u32, u32) = (3, 2, 2);
+        let mut image_data: Vec<u8> = Vec::new();
+        for y in 0..height {
+            for x in 0..width {
+                for band in 0..bands {
+                    let val = (band * 100 + y * 10 + x) as f32;
+                    image_data.extend_from_slice(&val.to_le_bytes());
+                }
+            }
+        }
+
+        // Image file directory entries as (tag, field type, count, value), sorted by tag,
+        // where field type 3 is SHORT and 4 is LONG
+        let data_offset: u32 = 8 + 2 + 12 * 12 + 4; // header + IFD with 12 entries
+        let entries: [(u16, u16, u32, [u16; 2]); 12] = [
+            (256, 3, 1, [width as u16, 0]),            // ImageWidth
+            (257, 3, 1, [height as u16, 0]),           // ImageLength
+            (258, 3, 2, [32, 32]),                     // BitsPerSample
+            (259, 3, 1, [1, 0]),                       // Compression (none)
+            (262, 3, 1, [1, 0]),                       // Photometric (BlackIsZero)
+            (273, 4, 1, [data_offset as u16, 0]),      // StripOffsets
+            (277, 3, 1, [bands as u16, 0]),            // SamplesPerPixel
+            (278, 3, 1, [height as u16, 0]),           // RowsPerStrip
+            (279, 4, 1, [image_data.len() as u16, 0]), // StripByteCounts
+            (284, 3, 1, [1, 0]),                       // PlanarConfiguration (chunky)
+            (338, 3, 1, [0, 0]),                       // ExtraSamples (unspecified)
+            (339, 3, 2, [3, 3]),                       // SampleFormat (IEEE float)
+        ];
+
+        // Write a little-endian TIFF file
+        let mut tiff_data: Vec<u8> = Vec::new();
+        tiff_data.extend_from_slice(b"II");
+        tiff_data.extend_from_slice(&42u16.to_le_bytes());
+        tiff_data.extend_from_slice(&8u32.to_le_bytes()); // offset of first IFD
+        tiff_data.extend_from_slice(&(entries.len() as u16).to_le_bytes());
+        for (tag, field_type, count, [first, second]) in entries {
+            tiff_data.extend_from_slice(&tag.to_le_bytes());
+            tiff_data.extend_from_slice(&field_type.to_le_bytes());
+            tiff_data.extend_from_slice(&count.to_le_bytes());
+            tiff_data.extend_from_slice(&first.to_le_bytes());
+            tiff_data.extend_from_slice(&second.to_le_bytes());
+        }
+        tiff_data.extend_from_slice(&0u32.to_le_bytes()); // no next IFD
+        assert_eq!(tiff_data.len(), data_offset as usize);
+        tiff_data.extend_from_slice(&image_data);
+
+        // Read the TIFF file, bands should be de-interleaved to (band, height, width)
+        let arr = read_geotiff(Cursor::new(tiff_data)).unwrap();
+        assert_eq!(arr.dim(), (2, 2, 3)); // (channels, height, width)
+        assert!(arr.is_standard_layout());
+        assert_eq!(
+            arr,
+            array![
+                [[0.0, 1.0, 2.0], [10.0, 11.0, 12.0]],
+                [[100.0, 101.0, 102.0], [110.0, 111.0, 112.0]]
+            ]
+        );
+    }
+
+    #[test]
+    fn test_cogreader_seek_to_overview_skips_masks() {
+        // Write a TIFF file with a 4x4 full resolution image, followed by its mask, a 2x2
+        // overview and the overview's mask, each filled with its NewSubfileType value
+        let mut file = tempfile().unwrap();
+        {
+            let mut tiff = TiffEncoder::new(&mut file).unwrap();
+            tiff.write_image::<colortype::Gray32Float>(4, 4, &[0.0; 16])
+                .unwrap();
+            for (subfile_type, size) in [(4u32, 4u32), (1, 2), (5, 2)] {
+                let mut image = tiff
+                    .new_image::<colortype::Gray32Float>(size, size)
+                    .unwrap();
+                image
+                    .encoder()
+                    .write_tag(Tag::NewSubfileType, subfile_type)
+                    .unwrap();
+                image
+                    .write_data(&vec![subfile_type as f32; (size * size) as usize])
+                    .unwrap();
+            }
+        }
+
+        // Level 1 is the first reduced resolution image that is not a mask
+        file.seek(SeekFrom::Start(0)).unwrap();
+        let mut reader = CogReader::new(&file).unwrap();
+        reader.seek_to_overview(1).unwrap();
+        let array = reader.ndarray().unwrap();
+        assert_eq!(array, array![[[1.0, 1.0], [1.0, 1.0]]]);
+
+        // There is no level 2, the overview's mask does not count
+        file.seek(SeekFrom::Start(0)).unwrap();
+        let mut reader = CogReader::new(&file).unwrap();
+        assert!(reader.seek_to_overview(2).is_err());
+    }
+
     #[tokio::test]
     async fn test_read_geotiff_multi_band() {
         let cog_url: &str =
@@ -244,4 +455,55 @@ mod tests {
             AffineTransform::new(200.0, 0.0, 499980.0, 0.0, -200.0, 5300040.0)
         );
     }
+
+    #[tokio::test]
+    async fn test_cogreader_xy_coords() {
+        let cog_url: &str =
+            "https://github.com/cogeotiff/rio-tiler/raw/6.4.0/tests/fixtures/cog_nodata_nan.tif";
+        let tif_url = Url::parse(cog_url).unwrap();
+        let (store, location) = parse_url(&tif_url).unwrap();
+
+        let result = store.get(&location).await.unwrap();
+        let bytes = result.bytes().await.unwrap();
+        let stream = Cursor::new(bytes);
+
+        let mut reader = CogReader::new(stream).unwrap();
+        let (x_coords, y_coords) = reader.xy_coords().unwrap();
+
+        assert_eq!(x_coords.len(), 549);
+        assert_eq!(x_coords[0], 500080.0);
+        assert_eq!(x_coords[548], 609680.0);
+        assert_eq!(y_coords.len(), 549);
+        assert_eq!(y_coords[0], 5299940.0);
+        assert_eq!(y_coords[548], 5190340.0);
+    }
+
+    #[tokio::test]
+    async fn test_cogreader_seek_to_overview() {
+        let cog_url: &str =
+            "https://github.com/cogeotiff/rio-tiler/raw/6.4.0/tests/fixtures/cog_nodata_nan.tif";
+        let tif_url = Url::parse(cog_url).unwrap();
+        let (store, location) = parse_url(&tif_url).unwrap();
+
+        let result = store.get(&location).await.unwrap();
+        let bytes = result.bytes().await.unwrap();
+        let stream = Cursor::new(bytes);
+
+        let mut reader = CogReader::new(stream).unwrap();
+        reader.seek_to_overview(1).unwrap();
+
+        let array = reader.ndarray().unwrap();
+        assert_eq!(array.dim(), (1, 275, 275));
+
+        // Overview pixels cover the same extent as the full resolution image
+        let (x_coords, y_coords) = reader.xy_coords().unwrap();
+        let x_res: f64 = 200.0 * 549.0 / 275.0;
+        let y_res: f64 = -200.0 * 549.0 / 275.0;
+        assert_eq!(x_coords.len(), 275);
+        assert!((x_coords[0] - (499980.0 + x_res / 2.0)).abs() < 1e-6);
+        assert!((x_coords[274] - (499980.0 + 549.0 * 200.0 - x_res / 2.0)).abs() < 1e-6);
+        assert_eq!(y_coords.len(), 275);
+        assert!((y_coords[0] - (5300040.0 + y_res / 2.0)).abs() < 1e-6);
+        assert!((y_coords[274] - (5300040.0 - 549.0 * 200.0 - y_res / 2.0)).abs() < 1e-6);
+    }
 }
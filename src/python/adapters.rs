@@ -1,22 +1,54 @@
+use std::collections::HashMap;
+#[cfg(feature = "mmap")]
+use std::fs::File;
 use std::io::Cursor;
+use std::path::PathBuf;
+use std::sync::{Arc, Mutex, PoisonError};
 
-use bytes::Bytes;
+use bytes::{Bytes, BytesMut};
+use futures::stream::{self, StreamExt, TryStreamExt};
+#[cfg(feature = "mmap")]
+use memmap2::MmapOptions;
 use ndarray::Array3;
-use numpy::{PyArray1, PyArray3, ToPyArray};
-use object_store::{parse_url, ObjectStore};
+use numpy::{IntoPyArray, PyArray1, PyArray3};
+use object_store::path::Path;
+use object_store::{parse_url, GetResult, ObjectStore};
 use pyo3::exceptions::{PyBufferError, PyFileNotFoundError, PyValueError};
 use pyo3::prelude::{pyclass, pyfunction, pymethods, pymodule, PyModule, PyResult, Python};
 use pyo3::{wrap_pyfunction, Bound, PyErr};
-use url::Url;
+use tiff::{TiffError, TiffFormatError};
+use tokio::runtime::Runtime;
+use url::{Position, Url};
 
 use crate::io::geotiff::CogReader;
 
+/// Size of each byte range requested when fetching a large remote file in parallel
+const RANGE_CHUNK_SIZE: usize = 4 * 1024 * 1024; // 4 MiB
+/// Maximum number of byte range requests in flight at once
+const MAX_CONCURRENT_REQUESTS: usize = 8;
+
+/// Async runtime and ObjectStore instances shared by remote reads within one process
+struct RemoteState {
+    /// ID of the process that created this state
+    pid: u32,
+    /// Async runtime to run remote reads on
+    runtime: Arc<Runtime>,
+    /// ObjectStore instances keyed by url scheme and host
+    stores: HashMap<String, Arc<dyn ObjectStore>>,
+}
+
+/// Remote read state of the current process, rebuilt after a fork
+static REMOTE_STATE: Mutex<Option<RemoteState>> = Mutex::new(None);
+
 /// Python class interface to a Cloud-optimized GeoTIFF reader.
 ///
 /// Parameters
 /// ----------
 /// path : str
 ///     The path to the file, or a url to a remote file.
+/// overview_level : int | None
+///     Which overview (reduced resolution) image to read, where 0 or None is the full
+///     resolution image, 1 is the first overview, and so on.
 ///
 /// Returns
 /// -------
@@ -45,11 +77,22 @@ struct PyCogReader {
 #[pymethods]
 impl PyCogReader {
     #[new]
-    fn new(path: &str) -> PyResult<Self> {
-        let stream: Cursor<Bytes> = path_to_stream(path)?;
-        let reader =
+    #[pyo3(signature = (path, overview_level=None))]
+    fn new(path: &str, overview_level: Option<usize>, py: Python<'_>) -> PyResult<Self> {
+        // Release the GIL while fetching the file, so other Python threads can run
+        let stream: Cursor<Bytes> = py.allow_threads(|| path_to_stream(path))?;
+        let mut reader =
             CogReader::new(stream).map_err(|err| PyValueError::new_err(err.to_string()))?;
 
+        if let Some(level) = overview_level {
+            reader.seek_to_overview(level).map_err(|err| match err {
+                TiffError::FormatError(TiffFormatError::ImageFileDirectoryNotFound) => {
+                    PyValueError::new_err(format!("Overview level {level} not found in {path}"))
+                }
+                _ => PyValueError::new_err(err.to_string()),
+            })?;
+        }
+
         Ok(Self { inner: reader })
     }
 
@@ -60,13 +103,13 @@ impl PyCogReader {
     /// array : np.ndarray
     ///     3D array of shape (band, height, width) containing the GeoTIFF pixel data.
     fn to_numpy<'py>(&mut self, py: Python<'py>) -> PyResult<Bound<'py, PyArray3<f32>>> {
-        let array_data: Array3<f32> = self
-            .inner
-            .ndarray()
+        // Release the GIL while decoding, so other Python threads can run
+        let array_data: Array3<f32> = py
+            .allow_threads(|| self.inner.ndarray())
             .map_err(|err| PyValueError::new_err(err.to_string()))?;
 
-        // Convert from ndarray (Rust) to numpy ndarray (Python)
-        Ok(array_data.to_pyarray_bound(py))
+        // Move ndarray (Rust) into numpy ndarray (Python) without copying the data
+        Ok(array_data.into_pyarray_bound(py))
     }
 
     /// Get x and y coordinates as numpy.ndarray
@@ -79,13 +122,40 @@ impl PyCogReader {
             .xy_coords()
             .map_err(|err| PyValueError::new_err(err.to_string()))?;
 
-        Ok((x_coords.to_pyarray_bound(py), y_coords.to_pyarray_bound(py)))
+        Ok((
+            x_coords.into_pyarray_bound(py),
+            y_coords.into_pyarray_bound(py),
+        ))
+    }
+
+    /// Get image pixel data and x/y coordinates from GeoTIFF in a single call
+    ///
+    /// Returns
+    /// -------
+    /// array : np.ndarray
+    ///     3D array of shape (band, height, width) containing the GeoTIFF pixel data.
+    /// x_coords : np.ndarray
+    ///     1D array of x-coordinates, one for the center of each pixel column.
+    /// y_coords : np.ndarray
+    ///     1D array of y-coordinates, one for the center of each pixel row.
+    fn read_all<'py>(
+        &mut self,
+        py: Python<'py>,
+    ) -> PyResult<(
+        Bound<'py, PyArray3<f32>>,
+        Bound<'py, PyArray1<f64>>,
+        Bound<'py, PyArray1<f64>>,
+    )> {
+        let array_data = self.to_numpy(py)?;
+        let (x_coords, y_coords) = self.xy_coords(py)?;
+
+        Ok((array_data, x_coords, y_coords))
     }
 }
 
 /// Read from a filepath or url into a byte stream
 fn path_to_stream(path: &str) -> PyResult<Cursor<Bytes>> {
-    // Parse URL into ObjectStore and path
+    // Parse path into a file or remote url
     let file_or_url = match Url::from_file_path(path) {
         // Parse local filepath
         Ok(filepath) => filepath,
@@ -93,13 +163,20 @@ fn path_to_stream(path: &str) -> PyResult<Cursor<Bytes>> {
         Err(_) => Url::parse(path)
             .map_err(|_| PyValueError::new_err(format!("Cannot parse path: {path}")))?,
     };
-    let (store, location) = parse_url(&file_or_url)
-        .map_err(|_| PyValueError::new_err(format!("Cannot parse url: {file_or_url}")))?;
 
-    // Initialize async runtime
-    let runtime = tokio::runtime::Builder::new_current_thread()
-        .enable_all()
-        .build()?;
+    // Read local files in one go, without spinning up an async runtime
+    if file_or_url.scheme() == "file" {
+        let filepath = file_or_url
+            .to_file_path()
+            .map_err(|_| PyValueError::new_err(format!("Cannot parse path: {path}")))?;
+        let bytes = read_local_file(filepath)
+            .map_err(|_| PyFileNotFoundError::new_err(format!("Cannot find file: {path}")))?;
+        return Ok(Cursor::new(bytes));
+    }
+
+    let (runtime, store) = runtime_and_store(&file_or_url)?;
+    let location = Path::from_url_path(file_or_url.path())
+        .map_err(|_| PyValueError::new_err(format!("Cannot parse url: {file_or_url}")))?;
 
     // Get TIFF file stream asynchronously
     let stream = runtime.block_on(async {
@@ -107,15 +184,127 @@ fn path_to_stream(path: &str) -> PyResult<Cursor<Bytes>> {
             .get(&location)
             .await
             .map_err(|_| PyFileNotFoundError::new_err(format!("Cannot find file: {path}")))?;
-        let bytes = result.bytes().await.map_err(|_| {
-            PyBufferError::new_err(format!("Failed to stream data from {path} into bytes."))
-        })?;
+        let bytes = get_byte_ranges(store.as_ref(), &location, result, RANGE_CHUNK_SIZE)
+            .await
+            .map_err(|_| {
+                PyBufferError::new_err(format!("Failed to stream data from {path} into bytes."))
+            })?;
         // Return cursor to in-memory buffer
         Ok::<Cursor<Bytes>, PyErr>(Cursor::new(bytes))
     })?;
     Ok(stream)
 }
 
+/// Fetch a remote file into an in-memory buffer, starting from the response of a GET
+/// request for the whole file
+///
+/// Files larger than `chunk_size` only have their first `chunk_size` bytes read from
+/// the GET response. The rest is fetched as consecutive byte ranges of that size, with
+/// up to [`MAX_CONCURRENT_REQUESTS`] requests in flight at once. Each range is appended
+/// to the buffer in order as it arrives.
+async fn get_byte_ranges(
+    store: &dyn ObjectStore,
+    location: &Path,
+    result: GetResult,
+    chunk_size: usize,
+) -> object_store::Result<Bytes> {
+    let file_size: usize = result.meta.size;
+    if file_size <= chunk_size {
+        // Small file, read it all from the one request
+        return result.bytes().await;
+    }
+
+    // Large file, keep the first chunk of the GET response and drop the rest of it
+    let mut buffer = BytesMut::with_capacity(file_size);
+    let mut first_chunk = result.into_stream();
+    while buffer.len() < chunk_size {
+        match first_chunk.next().await {
+            Some(bytes) => {
+                let bytes = bytes?;
+                let remaining: usize = chunk_size - buffer.len();
+                buffer.extend_from_slice(&bytes[..usize::min(remaining, bytes.len())]);
+            }
+            None => break,
+        }
+    }
+    drop(first_chunk);
+
+    let ranges = (buffer.len()..file_size)
+        .step_by(chunk_size)
+        .map(move |start| start..usize::min(start + chunk_size, file_size));
+    let buffer: BytesMut = stream::iter(ranges)
+        .map(|range| store.get_range(location, range))
+        .buffered(MAX_CONCURRENT_REQUESTS)
+        .try_fold(buffer, |mut buffer, chunk| async move {
+            buffer.extend_from_slice(&chunk);
+            Ok::<BytesMut, object_store::Error>(buffer)
+        })
+        .await?;
+
+    Ok(buffer.freeze())
+}
+
+/// Read a local file into an in-memory buffer
+#[cfg(not(feature = "mmap"))]
+fn read_local_file(filepath: PathBuf) -> std::io::Result<Bytes> {
+    Ok(Bytes::from(std::fs::read(filepath)?))
+}
+
+/// Memory-map a local file, so that byte ranges are read straight from the page cache
+/// rather than copied into a buffer up front
+#[cfg(feature = "mmap")]
+fn read_local_file(filepath: PathBuf) -> std::io::Result<Bytes> {
+    let file = File::open(&filepath)?;
+    // SAFETY: the file is assumed to not be modified or truncated while it is mapped
+    match unsafe { MmapOptions::new().map(&file) } {
+        Ok(mmap) => Ok(Bytes::from_owner(mmap)),
+        // Fallback to a buffered read, e.g. if the file does not fit in the address space
+        Err(_) => Ok(Bytes::from(std::fs::read(filepath)?)),
+    }
+}
+
+/// Get the async runtime and the ObjectStore for a url's scheme and host, so that the
+/// underlying HTTP client (and its open connections) is reused across reads from the
+/// same server
+///
+/// Both are created lazily for each process. A forked child process inherits a copy of
+/// the parent's state, but not the runtime's worker threads, so it builds its own.
+fn runtime_and_store(url: &Url) -> PyResult<(Arc<Runtime>, Arc<dyn ObjectStore>)> {
+    let pid: u32 = std::process::id();
+    let mut remote_state = REMOTE_STATE.lock().unwrap_or_else(PoisonError::into_inner);
+
+    let state: &mut RemoteState = match remote_state.take() {
+        Some(state) if state.pid == pid => remote_state.insert(state),
+        stale_state => {
+            // Leak any state inherited from a parent process, since dropping its runtime
+            // would try to shut down worker threads that do not exist in this process
+            std::mem::forget(stale_state);
+            let runtime = tokio::runtime::Builder::new_multi_thread()
+                .enable_all()
+                .build()?;
+            remote_state.insert(RemoteState {
+                pid,
+                runtime: Arc::new(runtime),
+                stores: HashMap::new(),
+            })
+        }
+    };
+
+    let key: &str = &url[..Position::BeforePath];
+    let store: Arc<dyn ObjectStore> = match state.stores.get(key) {
+        Some(store) => Arc::clone(store),
+        None => {
+            let (store, _location) = parse_url(url)
+                .map_err(|_| PyValueError::new_err(format!("Cannot parse url: {url}")))?;
+            let store: Arc<dyn ObjectStore> = Arc::from(store);
+            state.stores.insert(key.to_string(), Arc::clone(&store));
+            store
+        }
+    };
+
+    Ok((Arc::clone(&state.runtime), store))
+}
+
 /// Read a GeoTIFF file from a path on disk or a url into an ndarray
 ///
 /// Parameters
@@ -138,7 +327,7 @@ fn path_to_stream(path: &str) -> PyResult<Cursor<Bytes>> {
 #[pyo3(name = "read_geotiff")]
 fn read_geotiff_py<'py>(path: &str, py: Python<'py>) -> PyResult<Bound<'py, PyArray3<f32>>> {
     // Open URL with TIFF decoder
-    let mut reader = PyCogReader::new(path)?;
+    let mut reader = PyCogReader::new(path, None, py)?;
 
     // Decode TIFF into numpy ndarray
     let array_data = reader.to_numpy(py)?;
@@ -157,3 +346,49 @@ fn cog3pio<'py>(_py: Python, m: &Bound<'py, PyModule>) -> PyResult<()> {
     m.add_function(wrap_pyfunction!(read_geotiff_py, m)?)?;
     Ok(())
 }
+
+#[cfg(test)]
+mod tests {
+    use std::io::Write;
+
+    use bytes::Bytes;
+    use object_store::memory::InMemory;
+    use object_store::path::Path;
+    use object_store::ObjectStore;
+    use tempfile::NamedTempFile;
+
+    use crate::python::adapters::{get_byte_ranges, read_local_file};
+
+    #[test]
+    fn test_read_local_file() {
+        let mut file = NamedTempFile::new().unwrap();
+        file.write_all(b"II*\0local bytes").unwrap();
+
+        let bytes = read_local_file(file.path().to_path_buf()).unwrap();
+        assert_eq!(bytes, Bytes::from_static(b"II*\0local bytes"));
+
+        let missing = file.path().with_extension("missing.tif");
+        assert!(read_local_file(missing).is_err());
+    }
+
+    #[tokio::test]
+    async fn test_get_byte_ranges() {
+        let file_size: usize = 5000;
+        let expected = Bytes::from((0..file_size).map(|i| (i % 251) as u8).collect::<Vec<u8>>());
+        let store = InMemory::new();
+        let location = Path::from("test.tif");
+        store.put(&location, expected.clone()).await.unwrap();
+
+        // Single request (chunk size of file size), two ranges with a 1 byte remainder,
+        // ranges that divide the file size exactly, and several ranges where the last
+        // one is shorter
+        for chunk_size in [file_size, file_size - 1, 1000, file_size / 3 + 1, 64] {
+            let result = store.get(&location).await.unwrap();
+            let bytes = get_byte_ranges(&store, &location, result, chunk_size)
+                .await
+                .unwrap();
+            assert_eq!(bytes.len(), file_size, "chunk_size={chunk_size}");
+            assert_eq!(bytes, expected, "chunk_size={chunk_size}");
+        }
+    }
+}